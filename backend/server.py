@@ -1,87 +1,215 @@
 from fastapi import FastAPI, APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from websockets.exceptions import ConnectionClosed
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import WriteConcern
+from pymongo.errors import DuplicateKeyError, OperationFailure
+import redis.asyncio as aioredis
 import os
 import logging
-import json
+import orjson
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from dataclasses import dataclass, field
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Dict, Optional, Set
 import uuid
+import secrets
 from datetime import datetime, timezone
 import asyncio
+import zlib
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# Keep a warm pool for bursts of writes and compress wire traffic
+client = AsyncIOMotorClient(mongo_url, maxPoolSize=200, minPoolSize=20, compressors="zstd")
 db = client[os.environ['DB_NAME']]
 
+# Redis Pub/Sub for cross-worker WebSocket delivery (optional for a single worker)
+redis_url = os.environ.get('REDIS_URL')
+redis_client = aioredis.from_url(redis_url) if redis_url else None
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Pub/Sub channel per session and delivery target, so workers only receive
+# traffic for sessions they hold sockets for
+CHANNELS = {
+    'text': 'text:{}',
+    'viewers': 'stream:viewers:{}',
+    'broadcaster': 'stream:broadcaster:{}',
+}
+
+# Backoff bounds (seconds) for the Pub/Sub listener after a Redis error
+PUBSUB_RETRY_MIN = 0.5
+PUBSUB_RETRY_MAX = 30.0
+
+# Frames buffered per socket before a slow client is dropped
+SEND_QUEUE_SIZE = 64
+
+# What a send to a closed or closing socket raises; anything else is a bug and should surface
+SEND_ERRORS = (WebSocketDisconnect, ConnectionClosed, OSError, RuntimeError)
+
+# Stream clients offering this subprotocol get zlib-compressed signal frames.
+# SDP offers are large and compress well; chat stays uncompressed.
+SIGNAL_DEFLATE_SUBPROTOCOL = "signal-deflate"
+
+# On that subprotocol every signal carries a one-byte header saying whether the rest
+# is raw or zlib. Only signals this large are compressed; ICE candidates are a few
+# hundred bytes and barely shrink.
+SIGNAL_DEFLATE_MIN_SIZE = 1024
+SIGNAL_FRAME_RAW = b'\x00'
+SIGNAL_FRAME_ZLIB = b'\x01'
+
+def frame_signal(payload: bytes) -> bytes:
+    if len(payload) < SIGNAL_DEFLATE_MIN_SIZE:
+        return SIGNAL_FRAME_RAW + payload
+    return SIGNAL_FRAME_ZLIB + zlib.compress(payload)
+
+@dataclass(eq=False)
+class SendWorker:
+    # Owns all broadcast writes to one socket, so a slow client only backs up its own queue
+    websocket: WebSocket
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=SEND_QUEUE_SIZE))
+    writer_task: Optional[asyncio.Task] = None
+    closed: bool = False
+    deflate: bool = False
+
+    def start(self):
+        self.writer_task = asyncio.create_task(self.drain())
+
+    async def drain(self):
+        try:
+            while True:
+                await self.websocket.send_bytes(await self.queue.get())
+        except SEND_ERRORS:
+            # The endpoint's receive loop sees the disconnect and cleans up
+            self.closed = True
+
+    def send(self, payload: bytes) -> bool:
+        # False once the client has gone away or been dropped for falling behind
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.writer_task.cancel()
+        # Closing makes the endpoint's receive loop exit and run the usual disconnect cleanup
+        run_in_background(self.websocket.close(code=1013), "slow client close")
+
+    def stop(self):
+        self.closed = True
+        if self.writer_task is not None:
+            self.writer_task.cancel()
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
         # For text sessions
-        self.text_connections: Dict[str, List[WebSocket]] = {}
+        self.text_connections: Dict[str, Set[WebSocket]] = {}
         # For stream sessions
         self.stream_connections: Dict[str, Dict] = {}
+        # Send queue and writer task for every open socket
+        self.workers: Dict[WebSocket, SendWorker] = {}
+        # Redis Pub/Sub subscriptions and listener for this worker
+        self.pubsub = redis_client.pubsub(ignore_subscribe_messages=True) if redis_client else None
+        self.has_subscriptions = asyncio.Event()
+        self.listener_task: Optional[asyncio.Task] = None
         
+    def add_worker(self, websocket: WebSocket, deflate: bool = False):
+        worker = SendWorker(websocket, deflate=deflate)
+        worker.start()
+        self.workers[websocket] = worker
+
+    def remove_worker(self, websocket: WebSocket):
+        worker = self.workers.pop(websocket, None)
+        if worker is not None:
+            worker.stop()
+
     async def connect_text(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
+        self.add_worker(websocket)
         if session_id not in self.text_connections:
-            self.text_connections[session_id] = []
-        self.text_connections[session_id].append(websocket)
+            self.text_connections[session_id] = set()
+            await self.subscribe(session_id, 'text')
+        self.text_connections[session_id].add(websocket)
         
-    def disconnect_text(self, websocket: WebSocket, session_id: str):
+    async def disconnect_text(self, websocket: WebSocket, session_id: str):
+        self.remove_worker(websocket)
         if session_id in self.text_connections:
-            if websocket in self.text_connections[session_id]:
-                self.text_connections[session_id].remove(websocket)
+            self.text_connections[session_id].discard(websocket)
             if not self.text_connections[session_id]:
                 del self.text_connections[session_id]
+                await self.unsubscribe(session_id, 'text')
     
     async def broadcast_text(self, session_id: str, message: dict):
-        if session_id in self.text_connections:
-            for connection in self.text_connections[session_id].copy():
-                try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    self.text_connections[session_id].remove(connection)
+        # Serialize once per broadcast and send the UTF-8 bytes as-is to every recipient
+        await self.publish(session_id, 'text', orjson.dumps(message, option=orjson.OPT_UTC_Z))
+
+    def send_text_local(self, session_id: str, payload: bytes):
+        connections = self.text_connections.get(session_id)
+        if not connections:
+            return
+        # Queue for each socket's writer; a full queue drops that client only
+        dead = []
+        for connection in connections:
+            if not self.workers[connection].send(payload):
+                dead.append(connection)
+        connections.difference_update(dead)
 
     async def connect_stream(self, websocket: WebSocket, session_id: str, user_type: str):
-        await websocket.accept()
+        deflate = SIGNAL_DEFLATE_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+        await websocket.accept(subprotocol=SIGNAL_DEFLATE_SUBPROTOCOL if deflate else None)
+        self.add_worker(websocket, deflate=deflate)
         if session_id not in self.stream_connections:
             self.stream_connections[session_id] = {
                 'broadcaster': None,
-                'viewers': []
+                'viewers': set()
             }
         
+        connections = self.stream_connections[session_id]
         if user_type == 'broadcaster':
-            self.stream_connections[session_id]['broadcaster'] = websocket
+            if not connections['broadcaster']:
+                await self.subscribe(session_id, 'broadcaster')
+            connections['broadcaster'] = websocket
         else:
-            self.stream_connections[session_id]['viewers'].append(websocket)
+            if not connections['viewers']:
+                await self.subscribe(session_id, 'viewers')
+            connections['viewers'].add(websocket)
     
-    def disconnect_stream(self, websocket: WebSocket, session_id: str):
+    async def disconnect_stream(self, websocket: WebSocket, session_id: str):
+        self.remove_worker(websocket)
         if session_id in self.stream_connections:
-            if self.stream_connections[session_id]['broadcaster'] == websocket:
-                self.stream_connections[session_id]['broadcaster'] = None
-            elif websocket in self.stream_connections[session_id]['viewers']:
-                self.stream_connections[session_id]['viewers'].remove(websocket)
+            connections = self.stream_connections[session_id]
+            if connections['broadcaster'] == websocket:
+                connections['broadcaster'] = None
+                await self.unsubscribe(session_id, 'broadcaster')
+            else:
+                # May already be gone if a broadcast dropped it
+                connections['viewers'].discard(websocket)
+                if not connections['viewers']:
+                    await self.unsubscribe(session_id, 'viewers')
                 
             # Clean up empty sessions
-            if (not self.stream_connections[session_id]['broadcaster'] and 
-                not self.stream_connections[session_id]['viewers']):
+            if not connections['broadcaster'] and not connections['viewers']:
                 del self.stream_connections[session_id]
     
-    async def forward_stream_signal(self, session_id: str, signal: dict, sender: WebSocket):
+    async def forward_raw(self, session_id: str, payload: bytes, sender: WebSocket):
         if session_id not in self.stream_connections:
             return
             
@@ -89,24 +217,161 @@ class ConnectionManager:
         
         # Forward signals between broadcaster and viewers
         if sender == connections['broadcaster']:
-            # Send to all viewers
-            for viewer in connections['viewers'].copy():
-                try:
-                    await viewer.send_text(json.dumps(signal))
-                except:
-                    connections['viewers'].remove(viewer)
+            await self.publish(session_id, 'viewers', payload)
         elif sender in connections['viewers']:
+            await self.publish(session_id, 'broadcaster', payload)
+
+    def send_stream_local(self, session_id: str, target: str, payload: bytes):
+        if session_id not in self.stream_connections:
+            return
+
+        connections = self.stream_connections[session_id]
+
+        if target == 'viewers':
+            # Send to all viewers
+            recipients = connections['viewers']
+        elif connections['broadcaster']:
             # Send to broadcaster
-            if connections['broadcaster']:
+            recipients = {connections['broadcaster']}
+        else:
+            return
+
+        # Frame at most once per signal, however many clients opted in
+        framed = None
+        dead = []
+        for recipient in recipients:
+            worker = self.workers[recipient]
+            if worker.deflate and framed is None:
+                framed = frame_signal(payload)
+            if not worker.send(framed if worker.deflate else payload):
+                dead.append(recipient)
+        if target == 'viewers':
+            connections['viewers'].difference_update(dead)
+
+    def deliver_local(self, session_id: str, target: str, payload: bytes):
+        if target == 'text':
+            self.send_text_local(session_id, payload)
+        else:
+            self.send_stream_local(session_id, target, payload)
+
+    async def subscribe(self, session_id: str, target: str):
+        if self.pubsub is not None:
+            await self.pubsub.subscribe(CHANNELS[target].format(session_id))
+            self.has_subscriptions.set()
+
+    async def unsubscribe(self, session_id: str, target: str):
+        if self.pubsub is not None:
+            await self.pubsub.unsubscribe(CHANNELS[target].format(session_id))
+
+    async def publish(self, session_id: str, target: str, payload: bytes):
+        # Without Redis every socket lives in this process
+        if redis_client is None:
+            self.deliver_local(session_id, target, payload)
+            return
+        # Fire-and-forget: workers subscribed to this channel deliver to their own sockets
+        await redis_client.publish(CHANNELS[target].format(session_id), payload)
+
+    async def listen(self):
+        prefixes = {target: channel.format('') for target, channel in CHANNELS.items()}
+        retry_delay = PUBSUB_RETRY_MIN
+        try:
+            while True:
                 try:
-                    await connections['broadcaster'].send_text(json.dumps(signal))
-                except:
-                    connections['broadcaster'] = None
+                    # get_message needs at least one live subscription
+                    if not self.pubsub.subscribed:
+                        self.has_subscriptions.clear()
+                        await self.has_subscriptions.wait()
+                    event = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                except Exception:
+                    # Publishing keeps working, so a dead listener would silently stop
+                    # cross-worker delivery; back off and let the next get_message reconnect,
+                    # which resubscribes to every channel this worker holds
+                    logger.exception("Pub/Sub listener failed; retrying in %.1fs", retry_delay)
+                    await asyncio.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, PUBSUB_RETRY_MAX)
+                    continue
+                retry_delay = PUBSUB_RETRY_MIN
+                if event is None:
+                    continue
+                channel = event["channel"].decode()
+                for target, prefix in prefixes.items():
+                    if channel.startswith(prefix):
+                        self.deliver_local(channel[len(prefix):], target, event["data"])
+                        break
+        finally:
+            await self.pubsub.aclose()
 
 manager = ConnectionManager()
 
+# Chat messages are buffered and written in batches, unacknowledged (w=0)
+MESSAGE_BATCH_SIZE = 100
+MESSAGE_FLUSH_INTERVAL = 0.05  # seconds
+# Messages buffered for writing before new ones are dropped from history
+MESSAGE_QUEUE_SIZE = 10_000
+
+class MessageWriter:
+    def __init__(self, collection):
+        self.collection = collection
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def enqueue(self, message: dict):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Mongo is stalled; shed history writes rather than buffer them without bound.
+            # The message is still broadcast, it just won't appear in history
+            self.dropped += 1
+            if self.dropped == 1:
+                logger.warning("Text message write queue full; dropping messages from history")
+            return
+        if self.dropped:
+            logger.warning("Dropped %d text messages from history while the write queue was full",
+                           self.dropped)
+            self.dropped = 0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await self.queue.get()
+            if message is None:
+                return
+            batch = [message]
+            # Collect until the batch is full or the flush interval has passed
+            deadline = loop.time() + MESSAGE_FLUSH_INTERVAL
+            while len(batch) < MESSAGE_BATCH_SIZE:
+                try:
+                    message = await asyncio.wait_for(self.queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if message is None:
+                    await self.flush(batch)
+                    return
+                batch.append(message)
+            await self.flush(batch)
+
+    async def flush(self, batch: List[dict]):
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+        except Exception:
+            logger.exception("Failed to write %d text messages", len(batch))
+
+    async def close(self):
+        # Flush whatever is still queued, then stop
+        if self.task is not None:
+            # Waits for room when the queue is full; the backlog is bounded
+            await self.queue.put(None)
+            await self.task
+
+message_writer = MessageWriter(
+    db.get_collection('text_messages', write_concern=WriteConcern(w=0))
+)
+
 # Models
 class Session(BaseModel):
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     code: str
     session_type: str  # 'text' or 'stream'
@@ -117,6 +382,8 @@ class SessionCreate(BaseModel):
     session_type: str
 
 class TextMessage(BaseModel):
+    model_config = ConfigDict(extra='ignore', frozen=True)
+    
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     session_id: str
     username: str
@@ -127,37 +394,103 @@ class TextMessageCreate(BaseModel):
     username: str
     message: str
 
+# Timestamps go out as ISO 8601 with a trailing Z, the format Pydantic and
+# orjson's OPT_UTC_Z emit, so REST, history and WebSocket payloads agree
+def utc_z(timestamp: str) -> str:
+    # Documents stored before this format end in +00:00
+    return timestamp[:-6] + 'Z' if timestamp.endswith('+00:00') else timestamp
+
 # Helper function to prepare data for MongoDB
 def prepare_for_mongo(data):
     if isinstance(data, dict):
         for key, value in data.items():
             if isinstance(value, datetime):
-                data[key] = value.isoformat()
+                data[key] = utc_z(value.isoformat())
     return data
 
+# Fire-and-forget work that shouldn't delay the response; references are kept
+# until each task finishes so it isn't garbage collected mid-flight
+background_tasks: Set[asyncio.Task] = set()
+
+async def log_failure(coro, description: str):
+    try:
+        await coro
+    except Exception:
+        logger.exception("Background %s failed", description)
+
+def run_in_background(coro, description: str):
+    task = asyncio.create_task(log_failure(coro, description))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+# Active sessions are cached in Redis by code so joins skip Mongo
+SESSION_CACHE_KEY = "sess:{}"
+SESSION_CACHE_TTL = 3600  # seconds
+
+# Retries when a freshly generated code collides with an existing session
+SESSION_CODE_ATTEMPTS = 5
+
+# Cached in place of a closed session, so a lookup that read it from Mongo just
+# before the close can't put it back as active
+SESSION_CLOSED = b"closed"
+
+async def cache_session(code: str, session_dict: dict, only_if_absent: bool = False):
+    if redis_client is None:
+        return
+    try:
+        await redis_client.set(SESSION_CACHE_KEY.format(code), orjson.dumps(session_dict),
+                               ex=SESSION_CACHE_TTL, nx=only_if_absent)
+    except aioredis.RedisError:
+        # The cache only saves Mongo reads; a failed fill must not fail the request
+        logger.exception("Could not cache session %s", code)
+
 # Session endpoints
 @api_router.post("/sessions", response_model=Session)
 async def create_session(session_data: SessionCreate):
-    # Generate 6-digit code
-    code = str(uuid.uuid4())[:6].upper()
-    
-    session = Session(
-        code=code,
-        session_type=session_data.session_type
-    )
-    
-    session_dict = prepare_for_mongo(session.dict())
-    await db.sessions.insert_one(session_dict)
+    for _ in range(SESSION_CODE_ATTEMPTS):
+        # Generate 6-digit code
+        code = secrets.token_hex(3).upper()
+        
+        session = Session(
+            code=code,
+            session_type=session_data.session_type
+        )
+        
+        session_dict = prepare_for_mongo(session.model_dump())
+        try:
+            # insert_one adds _id to the document it's given, so keep session_dict clean
+            await db.sessions.insert_one(dict(session_dict))
+        except DuplicateKeyError:
+            continue
+        
+        await cache_session(code, session_dict)
+        # Already validated; echo the stored document without a second model pass
+        return ORJSONResponse(session_dict)
     
-    return session
+    raise HTTPException(status_code=503, detail="Could not allocate a session code")
 
 @api_router.get("/sessions/{code}", response_model=Session)
 async def get_session(code: str):
-    session = await db.sessions.find_one({"code": code, "is_active": True})
+    if redis_client is not None:
+        try:
+            cached = await redis_client.get(SESSION_CACHE_KEY.format(code))
+        except aioredis.RedisError:
+            # Fall back to Mongo, which is authoritative
+            logger.exception("Session cache read failed for %s", code)
+            cached = None
+        if cached == SESSION_CLOSED:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if cached is not None:
+            return Response(cached, media_type="application/json")
+
+    session = await db.sessions.find_one({"code": code, "is_active": True}, {"_id": 0})
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    session["created_at"] = utc_z(session["created_at"])
     
-    return Session(**session)
+    # Never overwrite a tombstone left by a concurrent close
+    await cache_session(code, session, only_if_absent=True)
+    return ORJSONResponse(session)
 
 @api_router.delete("/sessions/{code}")
 async def close_session(code: str):
@@ -169,6 +502,15 @@ async def close_session(code: str):
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Session not found")
     
+    if redis_client is not None:
+        try:
+            await redis_client.set(SESSION_CACHE_KEY.format(code), SESSION_CLOSED, ex=SESSION_CACHE_TTL)
+        except aioredis.RedisError:
+            # Stays strict: without the tombstone a cached copy keeps serving the session
+            # for up to SESSION_CACHE_TTL. Closing again rewrites it
+            logger.exception("Could not mark session %s closed in the cache", code)
+            raise
+    
     return {"message": "Session closed"}
 
 # Text message endpoints
@@ -180,56 +522,87 @@ async def send_text_message(session_id: str, message_data: TextMessageCreate):
         message=message_data.message
     )
     
-    message_dict = prepare_for_mongo(message.dict())
-    await db.text_messages.insert_one(message_dict)
+    message_dict = prepare_for_mongo(message.model_dump())
+    message_writer.enqueue(message_dict)
     
     # Broadcast to WebSocket connections
-    await manager.broadcast_text(session_id, {
+    run_in_background(manager.broadcast_text(session_id, {
         "type": "message",
-        "data": message.dict()
-    })
+        "data": message.model_dump()
+    }), "message broadcast")
     
-    return message
+    # Rendered now, before the batched writer adds _id to message_dict
+    return ORJSONResponse(message_dict)
 
-@api_router.get("/sessions/{session_id}/messages", response_model=List[TextMessage])
-async def get_text_messages(session_id: str):
-    messages = await db.text_messages.find({"session_id": session_id}).sort("timestamp", 1).to_list(1000)
-    return [TextMessage(**message) for message in messages]
+@api_router.get("/sessions/{session_id}/messages")
+async def get_text_messages(session_id: str) -> StreamingResponse:
+    # History is eventually consistent: messages are written in unacknowledged batches
+    # from whichever worker accepted them, so the newest ones can take a flush interval
+    # or so to appear. Live delivery goes through the WebSocket broadcast instead.
+    # Stored documents already have the TextMessage shape, so skip model validation
+    cursor = db.text_messages.find({"session_id": session_id}, {"_id": 0}).sort("timestamp", 1).limit(1000)
+    
+    # Stream the JSON array document by document instead of building the whole list
+    async def encode_messages():
+        separator = b'['
+        async for message in cursor:
+            message["timestamp"] = utc_z(message["timestamp"])
+            yield separator + orjson.dumps(message)
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+    
+    return StreamingResponse(encode_messages(), media_type="application/json")
+
+# Reply to keep-alive pings, encoded once
+PONG = orjson.dumps({"type": "pong"})
 
 # WebSocket endpoints for text sessions
 @app.websocket("/ws/text/{session_id}")
 async def websocket_text_endpoint(websocket: WebSocket, session_id: str):
-    await manager.connect_text(websocket, session_id)
     try:
+        await manager.connect_text(websocket, session_id)
         while True:
             # Keep connection alive and handle any incoming messages
             data = await websocket.receive_text()
             # Echo back for connection test
-            message = json.loads(data)
+            message = orjson.loads(data)
             if message.get("type") == "ping":
-                await websocket.send_text(json.dumps({"type": "pong"}))
+                await websocket.send_bytes(PONG)
     except WebSocketDisconnect:
-        manager.disconnect_text(websocket, session_id)
+        pass
+    finally:
+        # Any exit, including a malformed frame or a Redis error, must stop the
+        # socket's writer and drop its subscription
+        await manager.disconnect_text(websocket, session_id)
 
 # WebSocket endpoints for stream sessions  
 @app.websocket("/ws/stream/{session_id}/{user_type}")
 async def websocket_stream_endpoint(websocket: WebSocket, session_id: str, user_type: str):
-    await manager.connect_stream(websocket, session_id, user_type)
     try:
+        await manager.connect_stream(websocket, session_id, user_type)
         while True:
-            data = await websocket.receive_text()
-            signal = json.loads(data)
-            await manager.forward_stream_signal(session_id, signal, websocket)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            # Signals are relayed untouched, so skip the JSON round-trip
+            payload = message.get("bytes") or message.get("text", "").encode()
+            await manager.forward_raw(session_id, payload, websocket)
     except WebSocketDisconnect:
-        manager.disconnect_stream(websocket, session_id)
+        pass
+    finally:
+        await manager.disconnect_stream(websocket, session_id)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+cors_origins = [origin.strip() for origin in os.environ.get('CORS_ORIGINS', '*').split(',') if origin.strip()]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+    # Credentials can't be combined with a wildcard origin; without them the
+    # middleware takes its allow-all path instead of matching each Origin
+    allow_credentials=cors_origins != ['*'],
+    allow_origins=cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -241,6 +614,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    # Unique session codes and index-ordered message history. Codes stay reserved
+    # after a session closes, since closing only flips is_active.
+    try:
+        await db.sessions.create_index("code", unique=True)
+    except OperationFailure:
+        # Codes from before the index (truncated uuid4) may already collide; serve
+        # anyway, but collisions go undetected until the duplicates are removed
+        logger.exception("Could not build the unique index on sessions.code; "
+                         "deduplicate existing codes and restart to enforce uniqueness")
+    await db.text_messages.create_index([("session_id", 1), ("timestamp", 1)])
+
+@app.on_event("startup")
+async def start_message_writer():
+    message_writer.task = asyncio.create_task(message_writer.run())
+
+@app.on_event("startup")
+async def start_pubsub_listener():
+    if redis_client is not None:
+        manager.listener_task = asyncio.create_task(manager.listen())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await message_writer.close()
+    client.close()
+
+@app.on_event("shutdown")
+async def shutdown_pubsub():
+    if manager.listener_task is not None:
+        manager.listener_task.cancel()
+        # Let the listener close its Pub/Sub connection before the client goes away
+        try:
+            await manager.listener_task
+        except asyncio.CancelledError:
+            pass
+    if redis_client is not None:
+        await redis_client.aclose()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # libuv event loop and C HTTP parser instead of the asyncio/h11 defaults
+    uvicorn.run(
+        "server:app",
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', 8001)),
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        # Stream signaling compresses per signal via SIGNAL_DEFLATE_SUBPROTOCOL;
+        # per-frame deflate on every socket would only add CPU to small chat frames
+        ws_per_message_deflate=False,
+        # Workers share WebSocket traffic through Redis Pub/Sub, so set REDIS_URL before scaling out
+        workers=int(os.environ.get('WEB_CONCURRENCY', 1)),
+    )
@@ -16,6 +16,10 @@ import sys
 BASE_URL = "https://realtimeshare.preview.emergentagent.com/api"
 WS_BASE_URL = "wss://realtimeshare.preview.emergentagent.com"
 
+# Message history is written in batches, so give it up to ~2 s to show new sends
+HISTORY_POLLS = 20
+HISTORY_POLL_INTERVAL = 0.1  # seconds
+
 class BackendTester:
     def __init__(self):
         self.session = requests.Session()
@@ -171,11 +175,18 @@ class BackendTester:
         except Exception as e:
             self.log_result("text_messages", "Send second text message", False, str(e))
         
-        # Test 3: Retrieve messages
+        # Test 3: Retrieve messages; history is eventually consistent, so poll until
+        # both sends show up before judging it
         try:
-            response = self.session.get(f"{BASE_URL}/sessions/{session_id}/messages")
-            if response.status_code == 200:
+            for _ in range(HISTORY_POLLS):
+                response = self.session.get(f"{BASE_URL}/sessions/{session_id}/messages")
+                if response.status_code != 200:
+                    break
                 messages = response.json()
+                if isinstance(messages, list) and len(messages) >= 2:
+                    break
+                time.sleep(HISTORY_POLL_INTERVAL)
+            if response.status_code == 200:
                 if isinstance(messages, list) and len(messages) >= 2:
                     self.log_result("text_messages", "Retrieve text messages", True)
                 else:
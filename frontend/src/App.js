@@ -5,6 +5,27 @@ const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 const WS_URL = BACKEND_URL.replace('https://', 'wss://').replace('http://', 'ws://');
 
+// The server sends JSON as binary UTF-8 frames; accept text frames too
+const frameDecoder = new TextDecoder();
+const parseFrame = (data) => JSON.parse(typeof data === 'string' ? data : frameDecoder.decode(data));
+
+// Stream signaling can opt into zlib-compressed frames where the browser can inflate them.
+// Each frame then starts with a header byte: 0 for raw JSON, 1 for zlib (large signals only).
+const SIGNAL_DEFLATE = 'signal-deflate';
+const SIGNAL_PROTOCOLS = typeof DecompressionStream === 'undefined' ? [] : [SIGNAL_DEFLATE];
+const SIGNAL_FRAME_ZLIB = 1;
+const parseSignalFrame = async (ws, data) => {
+  if (ws.protocol !== SIGNAL_DEFLATE || typeof data === 'string') {
+    return parseFrame(data);
+  }
+  const body = new Uint8Array(data, 1);
+  if (new Uint8Array(data, 0, 1)[0] !== SIGNAL_FRAME_ZLIB) {
+    return parseFrame(body);
+  }
+  const inflated = new Blob([body]).stream().pipeThrough(new DecompressionStream('deflate'));
+  return JSON.parse(await new Response(inflated).text());
+};
+
 // Main App Component
 function App() {
   const [currentView, setCurrentView] = useState('home');
@@ -178,6 +199,7 @@ function TextSession({ session, onBack }) {
 
   const connectWebSocket = () => {
     const ws = new WebSocket(`${WS_URL}/ws/text/${session.id}`);
+    ws.binaryType = 'arraybuffer';
     
     ws.onopen = () => {
       setWsConnected(true);
@@ -185,7 +207,7 @@ function TextSession({ session, onBack }) {
     };
     
     ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+      const data = parseFrame(event.data);
       if (data.type === 'message') {
         setMessages(prev => [...prev, data.data]);
       }
@@ -378,6 +400,7 @@ function TextViewer({ session, onBack }) {
 
   const connectWebSocket = () => {
     const ws = new WebSocket(`${WS_URL}/ws/text/${session.id}`);
+    ws.binaryType = 'arraybuffer';
     
     ws.onopen = () => {
       setWsConnected(true);
@@ -385,7 +408,7 @@ function TextViewer({ session, onBack }) {
     };
     
     ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+      const data = parseFrame(event.data);
       if (data.type === 'message') {
         setMessages(prev => [...prev, data.data]);
       }
@@ -557,16 +580,22 @@ function StreamSession({ session, onBack }) {
   };
 
   const connectWebSocket = () => {
-    const ws = new WebSocket(`${WS_URL}/ws/stream/${session.id}/broadcaster`);
+    const ws = new WebSocket(`${WS_URL}/ws/stream/${session.id}/broadcaster`, SIGNAL_PROTOCOLS);
+    ws.binaryType = 'arraybuffer';
     
     ws.onopen = () => {
       setWsConnected(true);
       console.log('Stream WebSocket connected');
     };
     
-    ws.onmessage = async (event) => {
-      const signal = JSON.parse(event.data);
-      await handleSignal(signal);
+    // Compressed frames inflate asynchronously, so chain signals to handle them in arrival
+    // order; otherwise a small ICE candidate could overtake the larger offer/answer before it
+    let signals = Promise.resolve();
+    ws.onmessage = (event) => {
+      signals = signals
+        .then(() => parseSignalFrame(ws, event.data))
+        .then(handleSignal)
+        .catch((error) => console.error('Error handling signal:', error));
     };
     
     ws.onclose = () => {
@@ -892,7 +921,8 @@ function StreamViewer({ session, onBack }) {
   }, []);
 
   const connectWebSocket = () => {
-    const ws = new WebSocket(`${WS_URL}/ws/stream/${session.id}/viewer`);
+    const ws = new WebSocket(`${WS_URL}/ws/stream/${session.id}/viewer`, SIGNAL_PROTOCOLS);
+    ws.binaryType = 'arraybuffer';
     
     ws.onopen = () => {
       setWsConnected(true);
@@ -908,9 +938,14 @@ function StreamViewer({ session, onBack }) {
       setupPeerConnection();
     };
     
-    ws.onmessage = async (event) => {
-      const signal = JSON.parse(event.data);
-      await handleSignal(signal);
+    // Compressed frames inflate asynchronously, so chain signals to handle them in arrival
+    // order; otherwise a small ICE candidate could overtake the larger offer/answer before it
+    let signals = Promise.resolve();
+    ws.onmessage = (event) => {
+      signals = signals
+        .then(() => parseSignalFrame(ws, event.data))
+        .then(handleSignal)
+        .catch((error) => console.error('Error handling signal:', error));
     };
     
     ws.onclose = () => {
@@ -4,320 +4,480 @@ HTTP-only Backend API Testing for Real-time Streaming Application
 Tests session management and text messaging APIs
 """
 
-import requests
-import json
+import array
+import asyncio
+import collections
+import functools
+import httpcore
+import httpx
+import io
+import operator
+import orjson
+import os
+import socket
 import time
-from datetime import datetime
 import sys
 
 # Backend URL from frontend/.env
 BASE_URL = "https://realtimeshare.preview.emergentagent.com/api"
 
+# Request bodies, encoded to bytes once at import
+PAYLOAD_TEXT_B = b'{"session_type":"text"}'
+PAYLOAD_STREAM_B = b'{"session_type":"stream"}'
+PAYLOAD_MESSAGE_B = orjson.dumps({
+    "username": "Олександр",
+    "message": "Привіт! Це тестове повідомлення."
+})
+PAYLOAD_EMOJI_B = orjson.dumps({
+    "username": "Марія",
+    "message": "Друге тестове повідомлення з емодзі 🚀"
+})
+PAYLOAD_LONG_B = orjson.dumps({
+    "username": "Тестер",
+    "message": "Це дуже довге повідомлення для тестування обробки великих текстів. " * 10
+})
+PAYLOAD_ORPHAN_B = orjson.dumps({
+    "username": "Test",
+    "message": "This should work even for non-existent sessions"
+})
+
+_get_session_fields = operator.itemgetter("id", "code", "session_type")
+_get_timestamp = operator.itemgetter("timestamp")
+
+def _json(response):
+    """Decode a response body with orjson"""
+    return orjson.loads(response.content)
+
+@functools.lru_cache(maxsize=8)
+def make_validator(keys, types):
+    """Build a predicate, once per schema, that checks each key holds a value of its type"""
+    getter = operator.itemgetter(*keys)
+    if len(keys) == 1:
+        # A single-key itemgetter returns the bare value rather than a tuple
+        getter = lambda data, get=getter: (get(data),)
+    
+    def validate(data):
+        try:
+            values = getter(data)
+        except (KeyError, TypeError):
+            return False
+        return all(map(isinstance, values, types))
+    
+    return validate
+
+_is_session = make_validator(("id", "code", "session_type"), (str, str, str))
+_is_message = make_validator(("id", "username", "message", "session_id"), (str, str, str, str))
+
+def _valid_session(data, kind):
+    """Check a session payload has an id, a 6-char code and the expected type"""
+    return (_is_session(data) and bool(data["id"]) and len(data["code"]) == 6 and
+            data["session_type"] == kind)
+
+def _session_validator(kind):
+    """Build a body check for a created session of the given type"""
+    return lambda data: None if _valid_session(data, kind) else f"Invalid response structure: {data}"
+
+def _history_error(messages):
+    """Check retrieved history is a list of 3+ messages that all carry timestamps"""
+    # One C-level pass; a non-list body or a message without a timestamp raises
+    try:
+        timestamps = list(map(_get_timestamp, messages))
+    except (TypeError, KeyError):
+        return "Expected a list of messages with timestamps"
+    if len(timestamps) < 3:
+        return f"Expected list with 3+ messages, got: {len(timestamps)}"
+    return None
+
+# Buffered output lines written per flush
+LOG_FLUSH_LINES = 8
+
+# Opt-in cache for GET probes whose answer cannot change during a run; shared by
+# every tester in the process so repeat runs skip the network for them
+CACHEABLE_PATHS = frozenset({"/sessions/NONEXIST"})
+CACHE_TTL = 300
+_response_cache = {} if os.environ.get("SEEKEYCAST_TEST_CACHE") == "1" else None
+
+# Message history is written in batches, so give it up to ~2 s to show new sends
+HISTORY_POLLS = 20
+HISTORY_POLL_INTERVAL = 0.1  # seconds
+
+# Slowest tests listed in the summary
+SLOWEST_SHOWN = 5
+
+# Failure messages kept for the summary
+MAX_ERRORS = 256
+
+# Category -> slot in the pass/fail counters (passed at 2*i, failed at 2*i + 1)
+_CATS = {"session_management": 0, "text_messages": 1}
+_CAT_TITLES_B = {category: category.replace("_", " ").title().encode() for category in _CATS}
+
+# Summary fragments, UTF-8 encoded once
+SUMMARY_HEADER_B = b"\n" + b"=" * 60 + b"\n" + "🧪 HTTP BACKEND TEST SUMMARY".encode() + b"\n" + b"=" * 60
+PASS_B = "✅ PASS".encode()
+FAIL_B = "❌ FAIL".encode()
+ERROR_B = "  ❌ ".encode()
+SLOWEST_B = "\n⏱️  Slowest tests:".encode()
+ALL_PASSED_B = "🎉 All HTTP backend tests passed!".encode()
+WARNING_B = "⚠️  ".encode()
+
+class PinnedDNSBackend(httpcore.AsyncNetworkBackend):
+    """Resolve each host once and reuse its addresses for every new connection.
+    
+    Each connect tries the addresses in resolver order until one answers. Only the
+    TCP connect sees the address; TLS still gets the original hostname, so SNI and
+    certificate checks are unchanged.
+    """
+    
+    def __init__(self, backend):
+        self._backend = backend
+        self._lookups = {}
+    
+    async def resolve(self, host, port):
+        # Concurrent first connects share one lookup
+        lookup = self._lookups.get(host)
+        if lookup is None:
+            loop = asyncio.get_running_loop()
+            lookup = self._lookups[host] = asyncio.ensure_future(
+                loop.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+        try:
+            infos = await asyncio.shield(lookup)
+        except OSError:
+            # Let the next connect retry rather than pinning a failure
+            self._lookups.pop(host, None)
+            raise
+        # Keep every address (deduplicated, in order) so a dead one can be skipped
+        return list(dict.fromkeys(info[4][0] for info in infos))
+    
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        error = None
+        for address in await self.resolve(host, port):
+            try:
+                return await self._backend.connect_tcp(address, port, timeout=timeout,
+                                                       local_address=local_address,
+                                                       socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout, OSError) as e:
+                error = e
+        raise error
+    
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout,
+                                                       socket_options=socket_options)
+    
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
 class HTTPBackendTester:
     def __init__(self):
-        self.session = requests.Session()
-        self.test_results = {
-            "session_management": {"passed": 0, "failed": 0, "errors": []},
-            "text_messages": {"passed": 0, "failed": 0, "errors": []}
-        }
+        # One HTTP/2 connection multiplexes every request, including concurrent ones;
+        # connection failures are retried by the transport
+        limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        transport = httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=2)
+        # httpx has no public hook for the network backend, so wrap the pool's own
+        # where this httpx version still has one; otherwise resolve per connection
+        pool = getattr(transport, "_pool", None)
+        network_backend = getattr(pool, "_network_backend", None)
+        if network_backend is not None:
+            pool._network_backend = PinnedDNSBackend(network_backend)
+        self.client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            # Bounded connect and read times keep one hung request from stalling a gather()
+            timeout=httpx.Timeout(10, connect=3.05),
+            transport=transport,
+            headers={
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+                "User-Agent": "SeeKeyCast-Tester/1.0"
+            },
+            event_hooks={"response": [self._record_protocol]}
+        )
+        self._counts = array.array("i", [0] * (2 * len(_CATS)))
+        self._errors = collections.deque(maxlen=MAX_ERRORS)
         self.created_sessions = []
+        self._log = io.StringIO()
+        self._pending = 0
+        self._durations = {}
+        self._protocols = set()
+        
+        # URLs are fixed, so build them once; the hot path only fills in ids
+        self._sessions_url = "/sessions"
+        self._session_url_tmpl = "/sessions/%s".__mod__
+        self._msg_url_tmpl = "/sessions/%s/messages".__mod__
         
-    def log_result(self, category, test_name, success, error_msg=None):
-        """Log test result"""
+    def emit(self, line):
+        """Buffer an output line, writing to stdout every few lines"""
+        self._log.write(line)
+        self._log.write("\n")
+        self._pending += 1
+        if self._pending >= LOG_FLUSH_LINES:
+            self.flush_log()
+    
+    def flush_log(self):
+        """Write buffered output to stdout in one call"""
+        sys.stdout.write(self._log.getvalue())
+        sys.stdout.flush()
+        self._log.seek(0)
+        self._log.truncate()
+        self._pending = 0
+    
+    async def _record_protocol(self, response):
+        """Note which HTTP version each response was negotiated over"""
+        self._protocols.add(response.http_version)
+    
+    def log_result(self, category, test_name, success, error_msg=None, duration=None):
+        """Log test result, with the duration in ns of its request if it made one"""
+        if duration is not None:
+            self._durations[test_name] = duration
+        slot = 2 * _CATS[category]
         if success:
-            self.test_results[category]["passed"] += 1
-            print(f"✅ {test_name}")
+            self._counts[slot] += 1
+            self.emit(f"✅ {test_name}")
         else:
-            self.test_results[category]["failed"] += 1
-            self.test_results[category]["errors"].append(f"{test_name}: {error_msg}")
-            print(f"❌ {test_name}: {error_msg}")
+            self._counts[slot + 1] += 1
+            self._errors.append((category, f"{test_name}: {error_msg}"))
+            self.emit(f"❌ {test_name}: {error_msg}")
     
-    def test_session_management(self):
-        """Test session creation, retrieval, and closure"""
-        print("\n🔧 Testing Session Management API...")
+    @staticmethod
+    def unwrap(result):
+        """Re-raise an exception captured by _timed_request"""
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def _check(self, category, test_name, result, validate=None, status=200, duration=None):
+        """Log the outcome of one request.
         
-        # Test 1: Create text session
+        validate gets the decoded body and returns an error message, or None when it
+        passes. Returns the decoded body (or the response, with no validator) on success.
+        """
         try:
-            response = self.session.post(f"{BASE_URL}/sessions", 
-                                       json={"session_type": "text"})
-            if response.status_code == 200:
-                session_data = response.json()
-                if ("id" in session_data and "code" in session_data and 
-                    session_data["session_type"] == "text" and
-                    len(session_data["code"]) == 6):
-                    self.created_sessions.append(session_data)
-                    self.log_result("session_management", "Create text session", True)
-                    print(f"   Created session: {session_data['code']} (ID: {session_data['id']})")
-                else:
-                    self.log_result("session_management", "Create text session", False, 
-                                  f"Invalid response structure: {session_data}")
-            else:
-                self.log_result("session_management", "Create text session", False, 
-                              f"HTTP {response.status_code}: {response.text}")
+            response = self.unwrap(result)
+            if response.status_code != status:
+                self.log_result(category, test_name, False, 
+                              f"Expected {status}, got HTTP {response.status_code}: {response.text}",
+                              duration)
+                return None
+            if validate is None:
+                self.log_result(category, test_name, True, duration=duration)
+                return response
+            data = _json(response)
+            error = validate(data)
+            self.log_result(category, test_name, error is None, error, duration)
+            return data if error is None else None
         except Exception as e:
-            self.log_result("session_management", "Create text session", False, str(e))
+            self.log_result(category, test_name, False, str(e), duration)
+            return None
+    
+    async def _request(self, method, url, body=None):
+        """Send a request, answering cacheable GETs from the process cache when enabled"""
+        if _response_cache is None or method != "GET" or url not in CACHEABLE_PATHS:
+            return await self.client.request(method, url, content=body)
         
-        # Test 2: Create stream session
+        key = (str(self.client.base_url), url)
+        cached = _response_cache.get(key)
+        now = time.monotonic()
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        response = await self.client.request(method, url)
+        _response_cache[key] = (now + CACHE_TTL, response)
+        return response
+    
+    async def _timed_request(self, method, url, body=None):
+        """Send a request, returning (response or exception, duration in ns); never raises"""
+        started = time.perf_counter_ns()
         try:
-            response = self.session.post(f"{BASE_URL}/sessions", 
-                                       json={"session_type": "stream"})
-            if response.status_code == 200:
-                session_data = response.json()
-                if ("id" in session_data and "code" in session_data and 
-                    session_data["session_type"] == "stream" and
-                    len(session_data["code"]) == 6):
-                    self.created_sessions.append(session_data)
-                    self.log_result("session_management", "Create stream session", True)
-                    print(f"   Created session: {session_data['code']} (ID: {session_data['id']})")
-                else:
-                    self.log_result("session_management", "Create stream session", False, 
-                                  f"Invalid response structure: {session_data}")
-            else:
-                self.log_result("session_management", "Create stream session", False, 
-                              f"HTTP {response.status_code}: {response.text}")
+            result = await self._request(method, url, body)
         except Exception as e:
-            self.log_result("session_management", "Create stream session", False, str(e))
+            result = e
+        return result, time.perf_counter_ns() - started
+    
+    async def _run(self, category, spec):
+        """Send one (name, method, url, body, validate, status) test spec and check it"""
+        test_name, method, url, body, validate, status = spec
+        result, duration = await self._timed_request(method, url, body)
+        return self._check(category, test_name, result, validate, status, duration)
+    
+    async def _run_concurrently(self, category, specs):
+        """Send independent test specs together, then check them in order"""
+        results = await asyncio.gather(
+            *(self._timed_request(method, url, body) for _, method, url, body, _, _ in specs)
+        )
+        return [self._check(category, test_name, result, validate, status, duration)
+                for (test_name, _, _, _, validate, status), (result, duration) in zip(specs, results)]
+    
+    async def test_session_management(self):
+        """Test session creation, retrieval, and closure"""
+        self.emit("\n🔧 Testing Session Management API...")
+        category = "session_management"
+        
+        # Independent probes run concurrently; retrieve/close/verify below depend on them.
+        # Over HTTPS the pool queues them onto the one HTTP/2 connection still being set up
+        probes = (
+            ("Create text session", "POST", self._sessions_url, PAYLOAD_TEXT_B,
+             _session_validator("text"), 200),
+            ("Create stream session", "POST", self._sessions_url, PAYLOAD_STREAM_B,
+             _session_validator("stream"), 200),
+            ("Handle non-existent session", "GET", self._session_url_tmpl("NONEXIST"), None,
+             None, 404),
+        )
+        create_text, create_stream, _ = await self._run_concurrently(category, probes)
+        for session_data in (create_text, create_stream):
+            if session_data:
+                self.created_sessions.append(session_data)
+                self.emit(f"   Created session: {session_data['code']} (ID: {session_data['id']})")
         
-        # Test 3: Verify unique codes
+        # Verify unique codes
         if len(self.created_sessions) >= 2:
             codes = [session["code"] for session in self.created_sessions]
             if len(set(codes)) == len(codes):
-                self.log_result("session_management", "Unique session codes generated", True)
+                self.log_result(category, "Unique session codes generated", True)
             else:
-                self.log_result("session_management", "Unique session codes generated", False, 
+                self.log_result(category, "Unique session codes generated", False, 
                               f"Duplicate codes found: {codes}")
         
-        # Test 4: Retrieve session by code
-        if self.created_sessions:
-            try:
-                test_session = self.created_sessions[0]
-                response = self.session.get(f"{BASE_URL}/sessions/{test_session['code']}")
-                if response.status_code == 200:
-                    retrieved_session = response.json()
-                    if (retrieved_session["id"] == test_session["id"] and
-                        retrieved_session["code"] == test_session["code"] and
-                        retrieved_session["session_type"] == test_session["session_type"]):
-                        self.log_result("session_management", "Retrieve session by code", True)
-                    else:
-                        self.log_result("session_management", "Retrieve session by code", False, 
-                                      f"Retrieved session data doesn't match: {retrieved_session}")
-                else:
-                    self.log_result("session_management", "Retrieve session by code", False, 
-                                  f"HTTP {response.status_code}: {response.text}")
-            except Exception as e:
-                self.log_result("session_management", "Retrieve session by code", False, str(e))
-        
-        # Test 5: Retrieve non-existent session
-        try:
-            response = self.session.get(f"{BASE_URL}/sessions/NONEXIST")
-            if response.status_code == 404:
-                self.log_result("session_management", "Handle non-existent session", True)
-            else:
-                self.log_result("session_management", "Handle non-existent session", False, 
-                              f"Expected 404, got {response.status_code}")
-        except Exception as e:
-            self.log_result("session_management", "Handle non-existent session", False, str(e))
-        
-        # Test 6: Close session
-        if self.created_sessions:
-            try:
-                test_session = self.created_sessions[-1]  # Use last created session
-                response = self.session.delete(f"{BASE_URL}/sessions/{test_session['code']}")
-                if response.status_code == 200:
-                    response_data = response.json()
-                    if "message" in response_data:
-                        self.log_result("session_management", "Close session", True)
-                    else:
-                        self.log_result("session_management", "Close session", False, 
-                                      f"Invalid response: {response_data}")
-                else:
-                    self.log_result("session_management", "Close session", False, 
-                                  f"HTTP {response.status_code}: {response.text}")
-            except Exception as e:
-                self.log_result("session_management", "Close session", False, str(e))
+        if not self.created_sessions:
+            return
         
-        # Test 7: Try to retrieve closed session
-        if self.created_sessions:
-            try:
-                closed_session = self.created_sessions[-1]
-                response = self.session.get(f"{BASE_URL}/sessions/{closed_session['code']}")
-                if response.status_code == 404:
-                    self.log_result("session_management", "Closed session not retrievable", True)
-                else:
-                    self.log_result("session_management", "Closed session not retrievable", False, 
-                                  f"Expected 404 for closed session, got {response.status_code}")
-            except Exception as e:
-                self.log_result("session_management", "Closed session not retrievable", False, str(e))
+        # Retrieve the first session, then close the last one and check it is gone
+        test_session = self.created_sessions[0]
+        closed_session = self.created_sessions[-1]
+        expected_fields = _get_session_fields(test_session)
+        chain = (
+            ("Retrieve session by code", "GET", self._session_url_tmpl(test_session["code"]), None,
+             lambda d: None if _get_session_fields(d) == expected_fields
+             else f"Retrieved session data doesn't match: {d}", 200),
+            ("Close session", "DELETE", self._session_url_tmpl(closed_session["code"]), None,
+             lambda d: None if "message" in d else f"Invalid response: {d}", 200),
+            ("Closed session not retrievable", "GET", self._session_url_tmpl(closed_session["code"]), None,
+             None, 404),
+        )
+        for spec in chain:
+            await self._run(category, spec)
     
-    def test_text_messages(self):
+    async def test_text_messages(self):
         """Test text message sending and retrieval"""
-        print("\n💬 Testing Text Messages API...")
+        self.emit("\n💬 Testing Text Messages API...")
+        category = "text_messages"
         
         if not self.created_sessions:
-            self.log_result("text_messages", "Text messages test", False, 
+            self.log_result(category, "Text messages test", False, 
                           "No sessions available for testing")
             return
         
         # Use first session for text message testing (should still be active)
-        test_session = self.created_sessions[0]
-        session_id = test_session["id"]
-        
-        # Test 1: Send text message
-        try:
-            message_data = {
-                "username": "Олександр",
-                "message": "Привіт! Це тестове повідомлення."
-            }
-            response = self.session.post(f"{BASE_URL}/sessions/{session_id}/messages", 
-                                       json=message_data)
-            if response.status_code == 200:
-                message_response = response.json()
-                if ("id" in message_response and 
-                    message_response["username"] == "Олександр" and 
-                    message_response["message"] == "Привіт! Це тестове повідомлення." and
-                    message_response["session_id"] == session_id):
-                    self.log_result("text_messages", "Send text message", True)
-                    print(f"   Message ID: {message_response['id']}")
-                else:
-                    self.log_result("text_messages", "Send text message", False, 
-                                  f"Invalid message response: {message_response}")
-            else:
-                self.log_result("text_messages", "Send text message", False, 
-                              f"HTTP {response.status_code}: {response.text}")
-        except Exception as e:
-            self.log_result("text_messages", "Send text message", False, str(e))
+        session_id = self.created_sessions[0]["id"]
+        messages_url = self._msg_url_tmpl(session_id)
         
-        # Test 2: Send another message
-        try:
-            message_data = {
-                "username": "Марія",
-                "message": "Друге тестове повідомлення з емодзі 🚀"
-            }
-            response = self.session.post(f"{BASE_URL}/sessions/{session_id}/messages", 
-                                       json=message_data)
-            if response.status_code == 200:
-                message_response = response.json()
-                if ("id" in message_response and 
-                    message_response["username"] == "Марія" and
-                    "🚀" in message_response["message"]):
-                    self.log_result("text_messages", "Send message with emoji", True)
-                else:
-                    self.log_result("text_messages", "Send message with emoji", False, 
-                                  f"Invalid message response: {message_response}")
-            else:
-                self.log_result("text_messages", "Send message with emoji", False, 
-                              f"HTTP {response.status_code}: {response.text}")
-        except Exception as e:
-            self.log_result("text_messages", "Send message with emoji", False, str(e))
+        # The three sends are independent, so they share the connection concurrently
+        sends = (
+            ("Send text message", "POST", messages_url, PAYLOAD_MESSAGE_B,
+             lambda d: None if (_is_message(d) and d["username"] == "Олександр" and
+                                d["message"] == "Привіт! Це тестове повідомлення." and
+                                d["session_id"] == session_id)
+             else f"Invalid message response: {d}", 200),
+            ("Send message with emoji", "POST", messages_url, PAYLOAD_EMOJI_B,
+             lambda d: None if _is_message(d) and d["username"] == "Марія" and "🚀" in d["message"]
+             else f"Invalid message response: {d}", 200),
+            ("Send long message", "POST", messages_url, PAYLOAD_LONG_B, None, 200),
+        )
+        sent_message = (await self._run_concurrently(category, sends))[0]
+        if sent_message:
+            self.emit(f"   Message ID: {sent_message['id']}")
         
-        # Test 3: Send long message
-        try:
-            long_message = "Це дуже довге повідомлення для тестування обробки великих текстів. " * 10
-            message_data = {
-                "username": "Тестер",
-                "message": long_message
-            }
-            response = self.session.post(f"{BASE_URL}/sessions/{session_id}/messages", 
-                                       json=message_data)
-            if response.status_code == 200:
-                self.log_result("text_messages", "Send long message", True)
-            else:
-                self.log_result("text_messages", "Send long message", False, 
-                              f"HTTP {response.status_code}: {response.text}")
-        except Exception as e:
-            self.log_result("text_messages", "Send long message", False, str(e))
-        
-        # Test 4: Retrieve messages
-        try:
-            response = self.session.get(f"{BASE_URL}/sessions/{session_id}/messages")
-            if response.status_code == 200:
-                messages = response.json()
-                if isinstance(messages, list) and len(messages) >= 3:
-                    # Check if messages are sorted by timestamp
-                    timestamps = [msg.get("timestamp") for msg in messages if "timestamp" in msg]
-                    if len(timestamps) >= 2:
-                        self.log_result("text_messages", "Retrieve text messages", True)
-                        print(f"   Retrieved {len(messages)} messages")
-                    else:
-                        self.log_result("text_messages", "Retrieve text messages", False, 
-                                      "Messages missing timestamps")
-                else:
-                    self.log_result("text_messages", "Retrieve text messages", False, 
-                                  f"Expected list with 3+ messages, got: {len(messages) if isinstance(messages, list) else 'not a list'}")
-            else:
-                self.log_result("text_messages", "Retrieve text messages", False, 
-                              f"HTTP {response.status_code}: {response.text}")
-        except Exception as e:
-            self.log_result("text_messages", "Retrieve text messages", False, str(e))
+        # History is eventually consistent; wait until it settles, then check it once
+        for _ in range(HISTORY_POLLS):
+            try:
+                response = await self._request("GET", messages_url)
+                if response.status_code != 200 or _history_error(_json(response)) is None:
+                    break
+            except Exception:
+                break
+            await asyncio.sleep(HISTORY_POLL_INTERVAL)
         
-        # Test 5: Send message to non-existent session
-        try:
-            fake_session_id = "non-existent-session-id"
-            message_data = {
-                "username": "Test",
-                "message": "This should work even for non-existent sessions"
-            }
-            response = self.session.post(f"{BASE_URL}/sessions/{fake_session_id}/messages", 
-                                       json=message_data)
-            # This should succeed as the API doesn't validate session existence
-            if response.status_code == 200:
-                self.log_result("text_messages", "Send message to any session", True)
-            else:
-                self.log_result("text_messages", "Send message to any session", False, 
-                              f"HTTP {response.status_code}: {response.text}")
-        except Exception as e:
-            self.log_result("text_messages", "Send message to any session", False, str(e))
+        messages = await self._run(category, ("Retrieve text messages", "GET", messages_url, None,
+                                              _history_error, 200))
+        if messages:
+            self.emit(f"   Retrieved {len(messages)} messages")
+    
+    def start_message_to_any_session(self):
+        """Start sending to an unknown session; needs no created sessions, so it can
+        overlap the session flow"""
+        return asyncio.create_task(self._timed_request("POST", self._msg_url_tmpl("non-existent-session-id"),
+                                                      PAYLOAD_ORPHAN_B))
+    
+    async def test_message_to_any_session(self, probe):
+        """Check the send started by start_message_to_any_session"""
+        # This should succeed as the API doesn't validate session existence
+        result, duration = await probe
+        self._check("text_messages", "Send message to any session", result, duration=duration)
     
     def print_summary(self):
         """Print test summary"""
-        print("\n" + "="*60)
-        print("🧪 HTTP BACKEND TEST SUMMARY")
-        print("="*60)
+        # Flush buffered test lines first; the summary goes straight to the byte stream
+        self.flush_log()
+        parts = [SUMMARY_HEADER_B]
         
         total_passed = 0
         total_failed = 0
         
-        for category, results in self.test_results.items():
-            passed = results["passed"]
-            failed = results["failed"]
+        for category, index in _CATS.items():
+            passed = self._counts[2 * index]
+            failed = self._counts[2 * index + 1]
             total_passed += passed
             total_failed += failed
             
-            status = "✅ PASS" if failed == 0 else "❌ FAIL"
-            print(f"{category.replace('_', ' ').title()}: {status} ({passed} passed, {failed} failed)")
+            status = PASS_B if failed == 0 else FAIL_B
+            parts.append(b"%s: %s (%d passed, %d failed)" % (_CAT_TITLES_B[category], status, passed, failed))
             
-            if results["errors"]:
-                for error in results["errors"]:
-                    print(f"  ❌ {error}")
+            for error_category, error in self._errors:
+                if error_category == category:
+                    parts.append(ERROR_B + error.encode())
+        
+        parts.append(b"\nProtocol: " + (", ".join(sorted(self._protocols)) or "none").encode())
+        
+        slowest = sorted(self._durations.items(), key=operator.itemgetter(1), reverse=True)
+        parts.append(SLOWEST_B)
+        for test_name, duration in slowest[:SLOWEST_SHOWN]:
+            parts.append(b"  %8.1f ms  %s" % (duration / 1e6, test_name.encode()))
         
-        print(f"\nOverall: {total_passed} passed, {total_failed} failed")
+        parts.append(b"\nOverall: %d passed, %d failed" % (total_passed, total_failed))
         
         if total_failed == 0:
-            print("🎉 All HTTP backend tests passed!")
-            return True
+            parts.append(ALL_PASSED_B)
         else:
-            print(f"⚠️  {total_failed} tests failed - see details above")
-            return False
+            parts.append(b"%s%d tests failed - see details above" % (WARNING_B, total_failed))
+        
+        # One write to the binary buffer skips the text layer's per-line encoding
+        sys.stdout.buffer.write(b"\n".join(parts) + b"\n")
+        sys.stdout.buffer.flush()
+        return total_failed == 0
 
-def main():
+async def main():
     """Run all HTTP backend tests"""
     print("🚀 Starting HTTP Backend API Tests...")
     print(f"Testing against: {BASE_URL}")
     
     tester = HTTPBackendTester()
     
-    # Run HTTP API tests
-    tester.test_session_management()
-    tester.test_text_messages()
-    
-    # Print summary
-    success = tester.print_summary()
+    try:
+        # Run HTTP API tests; the create -> retrieve -> close -> message chain stays
+        # sequential while the independent probe overlaps it on the shared client.
+        # The probe is only checked afterwards, so its line prints under its own section
+        probe = tester.start_message_to_any_session()
+        await tester.test_session_management()
+        await tester.test_text_messages()
+        await tester.test_message_to_any_session(probe)
+        
+        # Print summary
+        success = tester.print_summary()
+    finally:
+        tester.flush_log()
+        await tester.client.aclose()
     
     return success
 
 if __name__ == "__main__":
     try:
-        success = main()
+        success = asyncio.run(main())
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n⏹️  Tests interrupted by user")
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 import asyncio
+import statistics
+import time
 import websockets
-import json
+import orjson
+
+# Pings sent over the one connection to sample round-trip latency
+PING_COUNT = 100
 
 async def test_simple_ws():
     # Test with a session that should exist
@@ -11,20 +16,27 @@ async def test_simple_ws():
     print(f"Testing WebSocket connection to: {ws_url}")
     
     try:
-        async with websockets.connect(ws_url, open_timeout=10) as websocket:
+        # Ping frames are tiny, so per-message deflate would only cost CPU
+        async with websockets.connect(ws_url, open_timeout=10, ping_interval=None,
+                                      compression=None, max_size=2**16) as websocket:
             print("✅ WebSocket connected successfully!")
             
-            # Send ping
-            ping_msg = {"type": "ping"}
-            await websocket.send(json.dumps(ping_msg))
-            print("📤 Sent ping message")
-            
-            # Wait for response
-            response = await asyncio.wait_for(websocket.recv(), timeout=5.0)
-            print(f"📥 Received: {response}")
+            # Reuse the connection so each sample is one round trip, not a handshake
+            samples = []
+            for seq in range(PING_COUNT):
+                started = time.perf_counter_ns()
+                await websocket.send(orjson.dumps({"type": "ping", "seq": seq}), text=True)
+                response = await asyncio.wait_for(websocket.recv(), timeout=5.0)
+                samples.append(time.perf_counter_ns() - started)
+            print(f"📤 Sent {PING_COUNT} ping messages")
+            print(f"📥 Last reply: {response}")
             
+            percentiles = statistics.quantiles(samples, n=100)
+            p50, p95, p99 = (percentiles[i - 1] / 1e6 for i in (50, 95, 99))
+            print(f"⏱️  RTT p50={p50:.2f}ms p95={p95:.2f}ms p99={p99:.2f}ms")
+    
     except Exception as e:
         print(f"❌ WebSocket connection failed: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(test_simple_ws())
\ No newline at end of file
+    asyncio.run(test_simple_ws())